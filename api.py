@@ -0,0 +1,351 @@
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import aiosqlite
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from franq_agent.graph import build_graph
+from franq_agent.utils.llm_cache import llm_cache
+from franq_agent.utils.state import DataVizType, QuestionType
+from franq_agent.utils.value_index import start_background_refresh
+
+# Shared by every worker so any of them can serve any thread.
+CHECKPOINT_DB = os.environ.get("CHECKPOINT_DB", "checkpoints.db")
+# Concurrent graph runs per worker, and how many more may wait for a slot.
+MAX_CONCURRENT_RUNS = int(os.environ.get("MAX_CONCURRENT_RUNS", "8"))
+MAX_QUEUED_RUNS = int(os.environ.get("MAX_QUEUED_RUNS", "32"))
+RETRY_AFTER_SECONDS = 2
+# How long a run's claim on its thread survives a worker that died mid-run.
+RUN_LEASE_SECONDS = 600
+
+# State fields each node's "node" progress event carries. Nodes return the whole
+# state, so only what that node produces is sent; the rest (schema, rows) is
+# served by the result endpoint.
+NODE_PROGRESS_FIELDS = {
+    "resolve_context": ("resolved_question",),
+    "classify": ("question_type",),
+    "schema": ("matched_values",),
+    "generate_sql": ("sql_query",),
+    "repair": ("sql_query", "repair_attempts"),
+    "guardrail": ("execution_error",),
+    "execute": ("execution_error",),
+}
+
+
+class RunRequest(BaseModel):
+    question: str
+
+
+class _RunLimiter:
+    """
+    Caps in-flight runs per worker and rejects new ones once the wait queue is
+    full. One run per thread is enforced across workers with a lease row in the
+    shared checkpoint database.
+    """
+
+    def __init__(
+        self, conn: aiosqlite.Connection, max_running: int, max_queued: int
+    ) -> None:
+        self._conn = conn
+        self._slots = asyncio.Semaphore(max_running)
+        self._max_admitted = max_running + max_queued
+        # Runs holding or waiting for a slot, counted from admission so the
+        # bound holds while lease writes are still pending.
+        self._admitted = 0
+
+    async def setup(self) -> None:
+        await self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_leases (
+                thread_id TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        await self._conn.commit()
+
+    async def _take_lease(self, thread_id: str) -> bool:
+        now = time.time()
+        cursor = await self._conn.execute(
+            """
+            INSERT INTO run_leases (thread_id, expires_at) VALUES (?, ?)
+            ON CONFLICT (thread_id) DO UPDATE SET expires_at = excluded.expires_at
+            WHERE run_leases.expires_at < ?
+            """,
+            (thread_id, now + RUN_LEASE_SECONDS, now),
+        )
+        await self._conn.commit()
+        return cursor.rowcount == 1
+
+    async def _drop_lease(self, thread_id: str) -> None:
+        await self._conn.execute(
+            "DELETE FROM run_leases WHERE thread_id = ?", (thread_id,)
+        )
+        await self._conn.commit()
+
+    async def acquire(self, thread_id: str) -> None:
+        if self._admitted >= self._max_admitted:
+            raise HTTPException(
+                429,
+                "Too many runs in progress, try again later.",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        # Reserve the spot before the first await, or concurrent requests all
+        # pass the check above while their lease writes are pending.
+        self._admitted += 1
+        try:
+            if not await self._take_lease(thread_id):
+                raise HTTPException(
+                    409, f"Thread '{thread_id}' already has a run in progress."
+                )
+            try:
+                await self._slots.acquire()
+            except BaseException:
+                await self._drop_lease(thread_id)
+                raise
+        except BaseException:
+            self._admitted -= 1
+            raise
+
+    async def release(self, thread_id: str) -> None:
+        self._admitted -= 1
+        self._slots.release()
+        await self._drop_lease(thread_id)
+
+
+class _AnswerStream:
+    """
+    Turns finalize's streamed reply into answer text. On the SQL path the model
+    writes JSON, so only the contents of its "answer" string are passed on;
+    plain-text replies (direct questions) go through unchanged.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._json: bool | None = None
+        self._in_answer = False
+        self._finished = False
+
+    def feed(self, chunk: str) -> str:
+        if self._finished:
+            return ""
+        self._buffer += chunk
+
+        if self._json is None:
+            start = self._buffer.lstrip()
+            if not start:
+                return ""
+            self._json = start[0] in "{`"  # JSON, possibly in a code fence
+        if not self._json:
+            text, self._buffer = self._buffer, ""
+            return text
+
+        if not self._in_answer:
+            match = re.search(r'"answer"\s*:\s*"', self._buffer)
+            if not match:
+                return ""
+            self._buffer = self._buffer[match.end() :]
+            self._in_answer = True
+
+        # Decode up to the closing quote, holding back an escape sequence that
+        # is split across chunks.
+        buf, i = self._buffer, 0
+        while i < len(buf):
+            if buf[i] == "\\":
+                size = 2
+                if buf[i + 1 : i + 2] == "u":
+                    # A high surrogate only decodes together with its pair.
+                    size = (
+                        12
+                        if buf[i + 2 : i + 4].lower() in ("d8", "d9", "da", "db")
+                        else 6
+                    )
+                if i + size > len(buf):
+                    break
+                i += size
+            elif buf[i] == '"':
+                self._finished = True
+                break
+            else:
+                i += 1
+        raw, self._buffer = buf[:i], buf[i:]
+        # Models sometimes put literal newlines or tabs in the string.
+        return json.loads(f'"{raw}"', strict=False)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    async with (
+        aiosqlite.connect(CHECKPOINT_DB, timeout=30) as conn,
+        aiosqlite.connect(CHECKPOINT_DB, timeout=30) as lease_conn,
+    ):
+        # Checkpointed state holds our StrEnums; allow them through msgpack.
+        serde = JsonPlusSerializer(
+            allowed_msgpack_modules=[
+                (QuestionType.__module__, QuestionType.__name__),
+                (DataVizType.__module__, DataVizType.__name__),
+            ]
+        )
+        checkpointer = AsyncSqliteSaver(conn, serde=serde)
+        await checkpointer.setup()
+        app.state.graph = build_graph(checkpointer)
+        app.state.limiter = _RunLimiter(
+            lease_conn, MAX_CONCURRENT_RUNS, MAX_QUEUED_RUNS
+        )
+        await app.state.limiter.setup()
+        start_background_refresh()
+        yield
+
+
+app = FastAPI(title="Dr. Frankstein Data Assistant API", lifespan=lifespan)
+
+
+def _config(thread_id: str) -> RunnableConfig:
+    return RunnableConfig(configurable={"thread_id": thread_id})
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _to_columnar(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """Convert row dicts into {"columns": [...], "data": {column: [values]}}."""
+    columns = list(rows[0].keys()) if rows else []
+    return {
+        "columns": columns,
+        "data": {col: [row.get(col) for row in rows] for col in columns},
+        "row_count": len(rows),
+    }
+
+
+async def _stream_run(
+    request: Request, thread_id: str, question: str
+) -> AsyncIterator[str]:
+    graph = request.app.state.graph
+
+    answer: _AnswerStream | None = _AnswerStream()
+    streamed_answer = False
+
+    try:
+        yield _sse("thread", {"thread_id": thread_id})
+        async for mode, chunk in graph.astream(
+            {"question": question},
+            config=_config(thread_id),
+            stream_mode=["updates", "messages"],
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                # Only the finalize node speaks to the user; other nodes' tokens
+                # are intermediate (SQL, plans, classifications).
+                if metadata.get("langgraph_node") == "finalize" and answer:
+                    try:
+                        content = answer.feed(message.text)
+                    except ValueError:
+                        # Undecodable reply: stop streaming and let the run
+                        # finish; final_answer is sent below as one token.
+                        answer = None
+                        streamed_answer = False
+                        continue
+                    if content:
+                        streamed_answer = True
+                        yield _sse("token", {"content": content})
+                continue
+
+            for node, update in chunk.items():
+                fields = {
+                    k: update[k]
+                    for k in NODE_PROGRESS_FIELDS.get(node, ())
+                    if update.get(k) is not None
+                }
+                yield _sse("node", {"node": node, **fields})
+
+        state = (await graph.aget_state(_config(thread_id))).values
+        # Finalize answers some paths (e.g. SQL that could not be repaired)
+        # without calling the model; send that answer as a single token.
+        if not streamed_answer and state.get("final_answer"):
+            yield _sse("token", {"content": state["final_answer"]})
+        yield _sse(
+            "done",
+            {
+                "thread_id": thread_id,
+                "answer": state.get("final_answer"),
+                "sql": state.get("last_sql_query"),
+                "data_viz_type": state.get("data_viz_type"),
+                "viz_config": state.get("viz_config"),
+                "row_count": len(state.get("query_result") or []),
+            },
+        )
+    except Exception as exc:
+        yield _sse("error", {"message": str(exc)})
+
+
+@app.get("/healthz")
+async def healthz() -> dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> dict[str, Any]:
+    """LLM response cache hit rates per node, for the worker serving the request."""
+    return {"mode": llm_cache.mode, "nodes": llm_cache.stats()}
+
+
+@app.post("/threads")
+async def create_thread() -> dict[str, str]:
+    return {"thread_id": str(uuid.uuid4())}
+
+
+@app.post("/threads/{thread_id}/runs")
+async def run(thread_id: str, body: RunRequest, request: Request) -> StreamingResponse:
+    """Run the agent on a thread, streaming progress as server-sent events.
+
+    Events: ``thread``, one ``node`` per finished node with the fields it
+    produced, ``token`` for pieces of the answer text, then ``done`` (or
+    ``error``). A thread already running on any worker gets 409.
+    """
+    limiter: _RunLimiter = request.app.state.limiter
+    await limiter.acquire(thread_id)
+    # Released as a background task so the slot is freed even if the client
+    # disconnects before the stream is consumed.
+    return StreamingResponse(
+        _stream_run(request, thread_id, body.question),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(limiter.release, thread_id),
+    )
+
+
+@app.get("/threads/{thread_id}/result")
+async def result(thread_id: str, request: Request) -> dict[str, Any]:
+    """Return the latest answer on a thread with its query result in columnar form."""
+    snapshot = await request.app.state.graph.aget_state(_config(thread_id))
+    state = snapshot.values
+    if not state:
+        raise HTTPException(404, f"Thread '{thread_id}' not found.")
+
+    return {
+        "thread_id": thread_id,
+        "question": state.get("resolved_question") or state.get("question"),
+        "answer": state.get("final_answer"),
+        "sql": state.get("last_sql_query"),
+        "data_viz_type": state.get("data_viz_type"),
+        "viz_config": state.get("viz_config"),
+        "result": _to_columnar(state.get("query_result") or []),
+    }
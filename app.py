@@ -9,6 +9,8 @@ import streamlit as st
 from langchain_core.runnables import RunnableConfig
 
 from franq_agent.graph import build_graph
+from franq_agent.utils.llm_cache import llm_cache
+from franq_agent.utils.value_index import start_background_refresh
 
 
 st.set_page_config(
@@ -44,6 +46,8 @@ def _render_chart(
         st.dataframe(df, use_container_width=True)
 
 
+start_background_refresh()
+
 if "graph" not in st.session_state:
     st.session_state.graph = build_graph()
 
@@ -115,3 +119,12 @@ if question:
             "data": data,
         }
     )
+
+
+# Rendered last so the stats include this run's LLM calls.
+with st.sidebar.expander(f"⚡ LLM cache ({llm_cache.mode})"):
+    cache_stats = llm_cache.stats()
+    if cache_stats:
+        st.dataframe(pd.DataFrame(cache_stats).T, use_container_width=True)
+    else:
+        st.caption("No LLM calls yet.")
@@ -1,3 +1,4 @@
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
 from langgraph.graph.state import CompiledStateGraph
@@ -31,7 +32,12 @@ def _route_after_execution(state: AgentState) -> str:
     return "finalize"
 
 
-def build_graph() -> CompiledStateGraph:
+def build_graph(checkpointer: BaseCheckpointSaver | None = None) -> CompiledStateGraph:
+    """Compile the agent graph.
+
+    Defaults to an in-process MemorySaver; pass a shared checkpointer when several
+    processes must see the same threads (e.g. the multi-worker HTTP API).
+    """
     builder = StateGraph(AgentState)
 
     builder.add_node("resolve_context", resolve_context)
@@ -64,4 +70,4 @@ def build_graph() -> CompiledStateGraph:
         {"finalize": "finalize", "repair": "repair"},
     )
 
-    return builder.compile(checkpointer=MemorySaver())
+    return builder.compile(checkpointer=checkpointer or MemorySaver())
@@ -8,84 +8,27 @@ DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 engine = create_engine(DATABASE_URL)
 
-LOW_CARDINALITY_THRESHOLD = 20
-CATEGORICAL_TYPES = ("CHAR", "TEXT", "VARCHAR", "STRING")
-
-
-def _is_categorical_type(col_type: str) -> bool:
-    return any(t in col_type.upper() for t in CATEGORICAL_TYPES)
-
-
-def _get_categorical_info(conn, table: str, col: str, limit: int) -> list[str] | None:
-    """
-    Returns distinct values if low cardinality, else None.
-    Uses single query with LIMIT + 1 strategy.
-    """
-    rows = conn.execute(
-        text(
-            f"""
-            SELECT "{col}"
-            FROM (
-                SELECT DISTINCT "{col}"
-                FROM "{table}"
-                WHERE "{col}" IS NOT NULL
-                LIMIT :limit
-            ) sub
-        """
-        ),
-        {"limit": limit + 1},  # fetch one extra to detect overflow
-    ).fetchall()
-
-    if not rows or len(rows) > limit:
-        return None  # exceeded threshold or empty
-
-    return [row[0] for row in rows]
-
 
 def get_schema() -> dict[str, Any]:
     """
-    Discover tables, columns, and nominal categorical columns with their values.
-    Optimized: single query per column.
+    Discover tables and columns. Column values are not included here: the ones
+    relevant to a question come from the value index (see value_index.py).
     """
     inspector = inspect(engine)
     schema: dict[str, Any] = {}
 
-    with engine.connect() as conn:
-        for table in inspector.get_table_names():
-            columns = inspector.get_columns(table)
-            pk_cols = set(
-                inspector.get_pk_constraint(table).get("constrained_columns", [])
-            )
-
-            table_info: dict[str, Any] = {
-                "columns": [],
-                "categorical_columns": {},
-            }
-
-            for col in columns:
-                col_name = col["name"]
-                col_type = str(col["type"])
-
-                table_info["columns"].append(
-                    {
-                        "name": col_name,
-                        "type": col_type,
-                        "pk": col_name in pk_cols,
-                    }
-                )
-
-                # Skip non-text types and primary keys
-                if not _is_categorical_type(col_type) or col_name in pk_cols:
-                    continue
-
-                values = _get_categorical_info(
-                    conn, table, col_name, LOW_CARDINALITY_THRESHOLD
-                )
-
-                if values is not None:
-                    table_info["categorical_columns"][col_name] = values
-
-            schema[table] = table_info
+    for table in inspector.get_table_names():
+        pk_cols = set(inspector.get_pk_constraint(table).get("constrained_columns", []))
+        schema[table] = {
+            "columns": [
+                {
+                    "name": col["name"],
+                    "type": str(col["type"]),
+                    "pk": col["name"] in pk_cols,
+                }
+                for col in inspector.get_columns(table)
+            ]
+        }
 
     return schema
 
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from enum import StrEnum, auto
+from typing import Any
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langgraph.config import get_config
+
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "llm_cache.db"),
+)
+LLM_CACHE_MAX_MB = float(os.environ.get("LLM_CACHE_MAX_MB", "100"))
+
+
+class CacheMode(StrEnum):
+    RECORD = auto()  # serve hits, call the model on misses and store the response
+    REPLAY = auto()  # serve hits only; a miss is an error (offline, zero latency)
+    PASSTHROUGH = auto()  # bypass the cache entirely
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+
+def _current_node() -> str:
+    """Name of the graph node making the LLM call, for per-node stats."""
+    try:
+        return get_config().get("metadata", {}).get("langgraph_node", "unknown")
+    except RuntimeError:  # called outside a graph run
+        return "unknown"
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Content-addressed LLM response cache stored in a local SQLite file.
+    Keys hash the serialized model + parameters (llm_string) and the formatted
+    messages (prompt); least recently used entries are evicted past max_bytes.
+    """
+
+    def __init__(
+        self, path: str, mode: CacheMode = CacheMode.RECORD, max_bytes: int = 0
+    ) -> None:
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self._hits: Counter[str] = Counter()
+        self._misses: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+
+        if self.mode == CacheMode.REPLAY and not os.path.exists(path):
+            raise CacheMissError(
+                f"No LLM response recording at {path}. Record one first with "
+                "LLM_CACHE_MODE=record."
+            )
+        if self.mode == CacheMode.RECORD:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS llm_cache_last_access "
+                    "ON llm_cache (last_access)"
+                )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call: nodes run on worker threads and
+        # several processes (API workers) may share the same file. Replay opens
+        # the file as an immutable recording, so it can be a read-only fixture.
+        if self.mode == CacheMode.REPLAY:
+            uri = f"file:{os.path.abspath(self.path)}?mode=ro&immutable=1"
+            conn = sqlite3.connect(uri, uri=True)
+        else:
+            conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            (self._hits if hit else self._misses)[_current_node()] += 1
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        if self.mode == CacheMode.PASSTHROUGH:
+            return None
+
+        key = self._key(prompt, llm_string)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.mode == CacheMode.RECORD:
+                conn.execute(
+                    "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+
+        self._count(hit=row is not None)
+        if row is None:
+            if self.mode == CacheMode.REPLAY:
+                raise CacheMissError(
+                    f"No recorded LLM response for node '{_current_node()}' "
+                    f"(key {key[:12]}) in {self.path}. Record it first with "
+                    "LLM_CACHE_MODE=record."
+                )
+            return None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return loads(row[0], allowed_objects="core")
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode != CacheMode.RECORD:
+            return
+
+        value = dumps(list(return_val))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, len(value), time.time()),
+            )
+            if self.max_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        (total,) = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        stale: list[str] = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY last_access"
+        ):
+            stale.append(key)
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in stale])
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+        with self._stats_lock:
+            self._hits.clear()
+            self._misses.clear()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Hits, misses and hit rate per graph node since this process started."""
+        with self._stats_lock:
+            nodes = sorted(set(self._hits) | set(self._misses))
+            return {
+                node: {
+                    "hits": self._hits[node],
+                    "misses": self._misses[node],
+                    "hit_rate": self._hits[node]
+                    / (self._hits[node] + self._misses[node]),
+                }
+                for node in nodes
+            }
+
+
+llm_cache = SQLiteLLMCache(
+    LLM_CACHE_PATH,
+    mode=CacheMode(os.environ.get("LLM_CACHE_MODE", CacheMode.RECORD)),
+    max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+)
@@ -3,13 +3,19 @@ from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from franq_agent.utils.state import AgentState, DataVizType, QuestionType
 from franq_agent.utils.db import execute_query, get_schema
+from franq_agent.utils.llm_cache import llm_cache
+from franq_agent.utils.value_index import find_values
 from typing import Any
 import json
 from franq_agent.utils.utils import strip_code_fence
 
 
 llm = ChatAnthropic(
-    model_name="claude-sonnet-4-6", temperature=0, timeout=None, stop=None
+    model_name="claude-sonnet-4-6",
+    temperature=0,
+    timeout=None,
+    stop=None,
+    cache=llm_cache,
 )
 
 FORBIDDEN_KEYWORDS = {
@@ -111,8 +117,10 @@ Respond with ONLY the word: sql  OR  direct""",
 
 
 def schema_discovery(state: AgentState) -> AgentState:
-    """Fetches the live database schema dynamically — no hardcoding."""
+    """Fetches the live database schema and the column values the question mentions."""
+    question = state.get("resolved_question") or state["question"]
     state["schema"] = get_schema()
+    state["matched_values"] = find_values(question)
     return state
 
 
@@ -120,13 +128,14 @@ def plan_query(state: AgentState) -> AgentState:
     """Creates a reasoning plan before generating SQL."""
     question = state.get("resolved_question") or state["question"]
     schema = json.dumps(state.get("schema") or {}, indent=2)
+    values = json.dumps(state.get("matched_values") or {}, ensure_ascii=False)
 
     prompt = ChatPromptTemplate.from_messages(
         [
             (
                 "system",
                 """You are a senior data analyst. Plan how to answer business questions using a database.
-Verify the categorical_columns and the values to match the words before creating the SQL query.
+Candidate values are real column values resembling words in the question; use one as a filter literal only if it is relevant.
 Always respond with ONLY valid JSON, no markdown, with this structure:
 {{
   "steps": ["list of reasoning steps"],
@@ -139,12 +148,17 @@ Always respond with ONLY valid JSON, no markdown, with this structure:
                 """Schema:
 {schema}
 
+Candidate values (use only if relevant):
+{values}
+
 Question: {question}""",
             ),
         ]
     )
 
-    response = llm.invoke(prompt.format_messages(schema=schema, question=question))
+    response = llm.invoke(
+        prompt.format_messages(schema=schema, values=values, question=question)
+    )
     content = strip_code_fence(str(response.content))
 
     try:
@@ -160,6 +174,7 @@ def generate_sql(state: AgentState) -> AgentState:
     """Generates a SQLite SELECT query from the plan."""
     question = state.get("resolved_question") or state["question"]
     schema = json.dumps(state.get("schema") or {}, indent=2)
+    values = json.dumps(state.get("matched_values") or {}, ensure_ascii=False)
     plan = state.get("plan") or {}
 
     prompt = ChatPromptTemplate.from_messages(
@@ -171,6 +186,7 @@ def generate_sql(state: AgentState) -> AgentState:
 Rules:
 - Only SELECT statements (no writes)
 - All column/table names must exist in the schema provided
+- Candidate values are hints: use one in a filter only if it fits the question
 - Use proper SQLite date functions where needed (strftime, date, etc.)
 - Return ONLY the SQL query, no explanation, no markdown""",
             ),
@@ -179,6 +195,9 @@ Rules:
                 """Schema:
 {schema}
 
+Candidate values (use only if relevant):
+{values}
+
 Query plan:
 {plan}
 
@@ -188,7 +207,9 @@ Question: {question}""",
     )
 
     response = llm.invoke(
-        prompt.format_messages(schema=schema, plan=json.dumps(plan), question=question)
+        prompt.format_messages(
+            schema=schema, values=values, plan=json.dumps(plan), question=question
+        )
     )
 
     state["sql_query"] = strip_code_fence(str(response.content))
@@ -236,6 +257,7 @@ def repair_sql(state: AgentState) -> AgentState:
     """Asks the LLM to fix the broken SQL using the error message as feedback."""
     question = state.get("resolved_question") or state["question"]
     schema = json.dumps(state.get("schema") or {}, indent=2)
+    values = json.dumps(state.get("matched_values") or {}, ensure_ascii=False)
     failed_sql = state.get("sql_query") or state.get("last_sql_query") or ""
     error = state.get("execution_error") or "Unknown error"
 
@@ -251,6 +273,9 @@ Return ONLY the corrected SQL query, no explanation, no markdown.""",
                 """Schema:
 {schema}
 
+Candidate values (use only if relevant):
+{values}
+
 Original question: {question}
 
 Broken SQL:
@@ -264,7 +289,7 @@ Error:
 
     response = llm.invoke(
         prompt.format_messages(
-            schema=schema, question=question, sql=failed_sql, error=error
+            schema=schema, values=values, question=question, sql=failed_sql, error=error
         )
     )
 
@@ -32,6 +32,7 @@ class AgentState(_AgentStateRequired, total=False):
 
     # Schema
     schema: dict[str, list[dict[str, Any]]]
+    matched_values: dict[str, dict[str, list[str]]]
 
     # Planning
     plan: dict[str, Any]
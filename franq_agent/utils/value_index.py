@@ -0,0 +1,358 @@
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, text
+
+from franq_agent.utils.db import engine
+
+logger = logging.getLogger(__name__)
+
+VALUE_INDEX_PATH = os.environ.get(
+    "VALUE_INDEX_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "value_index.db"),
+)
+VALUE_INDEX_REFRESH_SECONDS = float(os.environ.get("VALUE_INDEX_REFRESH_SECONDS", "60"))
+
+TEXT_TYPES = ("CHAR", "TEXT", "VARCHAR", "STRING")
+# Bump when the stored format changes; older index files are rebuilt.
+INDEX_VERSION = 2
+BATCH_SIZE = 10_000
+# Columns whose sampled values all look like dates, numbers or emails are not
+# indexed: question words can't usefully match them.
+SAMPLE_SIZE = 20
+UNMATCHABLE_VALUE = re.compile(r"[\d\s:/.,+-]+|[^@\s]+@[^@\s]+")
+# A value word matches a question term when they share a prefix covering at
+# least this fraction of the longer one ("reclamacoes" ~ "reclamacao").
+MIN_PREFIX_SIMILARITY = 0.7
+# Below this common-prefix length only exact words and plurals match, so
+# "canal" does not pick up "cana".
+MIN_PREFIX_LENGTH = 5
+FTS_CANDIDATES = 200
+MAX_VALUES_PER_COLUMN = 5
+MAX_MATCHED_VALUES = 40
+STOPWORDS = set(
+    # pt
+    """
+    que qual quais quantos quantas como onde quando com sem por para pelo pela dos
+    das nos nas uma uns umas mais menos maior menor entre sobre cada ano mes dia
+    total media numero lista liste mostre foram tem teve tiveram esta estao ultimo
+    ultima
+    """.split()
+    # en
+    + """
+    the and for with what which how many much from per top list show are was were
+    last year month
+    """.split()
+)
+
+_refresh_lock = threading.Lock()
+_refresher_lock = threading.Lock()
+_refresher: threading.Thread | None = None
+
+
+def _words(value: str) -> list[str]:
+    """Lowercase, accent-free words, so "São Paulo" and "sao paulo" index alike."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return re.findall(r"\w+", plain.casefold())
+
+
+def _normalize(value: str) -> str:
+    return " ".join(_words(value))
+
+
+def _is_text_type(col_type: str) -> bool:
+    return any(t in col_type.upper() for t in TEXT_TYPES)
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    conn = sqlite3.connect(VALUE_INDEX_PATH, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _create_index(conn: sqlite3.Connection) -> None:
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version != INDEX_VERSION:
+        conn.executescript(
+            """
+            DROP TABLE IF EXISTS column_values_fts;
+            DROP TABLE IF EXISTS column_values;
+            DROP TABLE IF EXISTS index_state;
+            """
+        )
+    conn.executescript(
+        f"""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        CREATE TABLE IF NOT EXISTS column_values (
+            id INTEGER PRIMARY KEY,
+            tbl TEXT NOT NULL,
+            col TEXT NOT NULL,
+            value TEXT NOT NULL,
+            norm TEXT NOT NULL,
+            UNIQUE (tbl, col, value)
+        );
+        CREATE INDEX IF NOT EXISTS column_values_norm ON column_values (norm);
+        CREATE VIRTUAL TABLE IF NOT EXISTS column_values_fts USING fts5(
+            norm, content='column_values', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS column_values_ai AFTER INSERT ON column_values
+        BEGIN
+            INSERT INTO column_values_fts (rowid, norm) VALUES (new.id, new.norm);
+        END;
+        CREATE TRIGGER IF NOT EXISTS column_values_ad AFTER DELETE ON column_values
+        BEGIN
+            INSERT INTO column_values_fts (column_values_fts, rowid, norm)
+            VALUES ('delete', old.id, old.norm);
+        END;
+        CREATE TABLE IF NOT EXISTS index_state (
+            tbl TEXT NOT NULL,
+            col TEXT NOT NULL,
+            watermark INTEGER NOT NULL,
+            PRIMARY KEY (tbl, col)
+        );
+        PRAGMA user_version = {INDEX_VERSION};
+        """
+    )
+
+
+def _row_key(inspector, table: str) -> str:
+    """Monotonic column used to find rows added since the last refresh."""
+    pk = inspector.get_pk_constraint(table).get("constrained_columns", [])
+    if len(pk) == 1:
+        col_type = next(
+            str(c["type"]) for c in inspector.get_columns(table) if c["name"] == pk[0]
+        )
+        if "INT" in col_type.upper():
+            return f'"{pk[0]}"'
+    return "rowid"
+
+
+def _text_columns(inspector, table: str) -> list[str]:
+    pk_cols = set(inspector.get_pk_constraint(table).get("constrained_columns", []))
+    return [
+        col["name"]
+        for col in inspector.get_columns(table)
+        if col["name"] not in pk_cols and _is_text_type(str(col["type"]))
+    ]
+
+
+def _is_matchable(source, table: str, col: str) -> bool:
+    sample = source.execute(
+        text(f'SELECT "{col}" FROM "{table}" WHERE "{col}" IS NOT NULL LIMIT :n'),
+        {"n": SAMPLE_SIZE},
+    ).scalars()
+    return not all(UNMATCHABLE_VALUE.fullmatch(str(v)) for v in sample)
+
+
+def _drop_column(index: sqlite3.Connection, table: str, col: str) -> None:
+    index.execute("DELETE FROM column_values WHERE tbl = ? AND col = ?", (table, col))
+    index.execute("DELETE FROM index_state WHERE tbl = ? AND col = ?", (table, col))
+
+
+def _refresh_column(
+    source, index: sqlite3.Connection, table: str, col: str, key: str
+) -> None:
+    row = index.execute(
+        "SELECT watermark FROM index_state WHERE tbl = ? AND col = ?", (table, col)
+    ).fetchone()
+    watermark = row[0] if row else 0
+    high = source.execute(text(f'SELECT MAX({key}) FROM "{table}"')).scalar() or 0
+
+    if high < watermark:  # table was emptied or recreated: start over
+        index.execute(
+            "DELETE FROM column_values WHERE tbl = ? AND col = ?", (table, col)
+        )
+        watermark = 0
+    if high == watermark:
+        return
+
+    result = source.execution_options(stream_results=True).execute(
+        text(
+            f"""
+            SELECT DISTINCT "{col}"
+            FROM "{table}"
+            WHERE {key} > :low AND {key} <= :high AND "{col}" IS NOT NULL
+            """
+        ),
+        {"low": watermark, "high": high},
+    )
+    while batch := result.fetchmany(BATCH_SIZE):
+        index.executemany(
+            "INSERT OR IGNORE INTO column_values (tbl, col, value, norm) "
+            "VALUES (?, ?, ?, ?)",
+            [(table, col, str(v), _normalize(str(v))) for (v,) in batch],
+        )
+    index.execute(
+        "INSERT OR REPLACE INTO index_state (tbl, col, watermark) VALUES (?, ?, ?)",
+        (table, col, high),
+    )
+
+
+def refresh_value_index() -> None:
+    """
+    Index the distinct values of every text column, reading only rows added since
+    the previous refresh. Returns immediately if another thread is refreshing.
+    Rows updated or deleted in place are not tracked.
+    """
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        inspector = inspect(engine)
+        with engine.connect() as source, _connect() as index:
+            _create_index(index)
+            for table in inspector.get_table_names():
+                key = _row_key(inspector, table)
+                for col in _text_columns(inspector, table):
+                    if _is_matchable(source, table, col):
+                        _refresh_column(source, index, table, col, key)
+                    else:
+                        _drop_column(index, table, col)
+                    # Commit per column so other workers are not locked out
+                    # for the whole of a first, full build.
+                    index.commit()
+    finally:
+        _refresh_lock.release()
+
+
+def _refresh_forever() -> None:
+    while True:
+        try:
+            refresh_value_index()
+        except sqlite3.OperationalError as exc:
+            # Typically another worker holding the write lock for its own
+            # refresh; lookups keep using what is indexed and we retry later.
+            logger.warning("Value index refresh skipped: %s", exc)
+        except Exception:
+            logger.exception("Value index refresh failed")
+        time.sleep(VALUE_INDEX_REFRESH_SECONDS)
+
+
+def start_background_refresh() -> None:
+    """
+    Keep the index current from a daemon thread, refreshing every
+    VALUE_INDEX_REFRESH_SECONDS, so questions never wait on a build.
+    Safe to call repeatedly; one thread is started per process.
+    """
+    global _refresher
+
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(
+                target=_refresh_forever, name="value-index-refresh", daemon=True
+            )
+            _refresher.start()
+
+
+def _terms(words: list[str]) -> list[str]:
+    return [w for w in words if len(w) >= 3 and not w.isdigit() and w not in STOPWORDS]
+
+
+def _similarity(term: str, word: str) -> float:
+    short, long = sorted((term, word), key=len)
+    if long in (short, short + "s", short + "es"):  # same word or its plural
+        return 1.0
+    prefix = len(os.path.commonprefix([term, word]))
+    if prefix < MIN_PREFIX_LENGTH:
+        return 0.0
+    return prefix / len(long)
+
+
+def _word_start_matches(
+    conn: sqlite3.Connection, prefixes: tuple[str, ...]
+) -> list[tuple[str, str, str, str]]:
+    # Trigram matches are substrings anywhere; keep only values with a word
+    # starting with each prefix before limiting, so "rio" is not crowded out by
+    # hundreds of "mario".
+    where, params = [], []
+    for prefix in prefixes:
+        pattern = prefix.replace("_", r"\_") + "%"
+        where.append(r"(v.norm LIKE ? ESCAPE '\' OR v.norm LIKE ? ESCAPE '\')")
+        params += [pattern, "% " + pattern]
+    return conn.execute(
+        f"""
+        SELECT v.tbl, v.col, v.value, v.norm
+        FROM column_values_fts
+        JOIN column_values v ON v.id = column_values_fts.rowid
+        WHERE column_values_fts MATCH ? AND {" AND ".join(where)}
+        LIMIT ?
+        """,
+        [" ".join(f'"{p}"' for p in prefixes), *params, FTS_CANDIDATES],
+    ).fetchall()
+
+
+def find_values(question: str) -> dict[str, dict[str, list[str]]]:
+    """
+    Return indexed column values matching words of the question, grouped as
+    {table: {column: [values]}}. Whole values are matched exactly against single
+    words and runs of up to four; words also match value words sharing a long
+    prefix, looked up by adjacent pairs and then by the whole word first so close
+    matches are not crowded out. A value scores the sum of what it matched, so
+    "Pedro Santos" outranks "Pedro Lima" for "pedro santos". At most
+    MAX_VALUES_PER_COLUMN values are kept per column, best matches first.
+    """
+    words = _words(question)
+    terms = _terms(words)
+    if not words or not os.path.exists(VALUE_INDEX_PATH):
+        return {}
+
+    phrases = {
+        " ".join(words[i : i + n]) for n in (2, 3, 4) for i in range(len(words) - n + 1)
+    }
+    # Best score per value for each question word or phrase it matched.
+    scored: dict[tuple[str, str, str], dict[str, float]] = {}
+
+    def add(match: tuple[str, str, str], key: str, score: float) -> None:
+        matched = scored.setdefault(match, {})
+        matched[key] = max(matched.get(key, 0.0), score)
+
+    lookups = [pair for pair in zip(terms, terms[1:]) if pair[0] != pair[1]]
+    for term in terms:
+        stem = term[: max(3, math.ceil(len(term) * MIN_PREFIX_SIMILARITY))]
+        lookups += [(term,), (stem,)]
+
+    try:
+        with _connect() as conn:
+            for phrase in phrases | set(words):
+                for tbl, col, value in conn.execute(
+                    "SELECT tbl, col, value FROM column_values WHERE norm = ?",
+                    (phrase,),
+                ):
+                    add((tbl, col, value), phrase, 1.0 + phrase.count(" "))
+
+            for prefixes in dict.fromkeys(lookups):
+                for tbl, col, value, norm in _word_start_matches(conn, prefixes):
+                    value_words = norm.split()
+                    for term in terms:
+                        score = max(_similarity(term, w) for w in value_words)
+                        if score >= MIN_PREFIX_SIMILARITY:
+                            add((tbl, col, value), term, score)
+    except sqlite3.DatabaseError:
+        # Not built yet, locked or unreadable: answer without hints.
+        logger.warning("Value index unavailable", exc_info=True)
+        return {}
+
+    best = sorted(scored.items(), key=lambda item: sum(item[1].values()), reverse=True)
+    values: dict[str, dict[str, list[str]]] = {}
+    total = 0
+    for (tbl, col, value), _ in best:
+        column = values.setdefault(tbl, {}).setdefault(col, [])
+        if len(column) < MAX_VALUES_PER_COLUMN:
+            column.append(value)
+            total += 1
+            if total == MAX_MATCHED_VALUES:
+                break
+    return values
@@ -0,0 +1,218 @@
+"""Load test for the HTTP API.
+
+By default it serves ``api.app`` in-process with a fake LLM, so the numbers
+measure the service itself (graph, checkpointer, SQLite, SSE) rather than
+Anthropic's latency. Pass ``--url`` to hit an already running deployment instead.
+
+    uv run python loadtest.py --requests 200 --concurrency 20
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+QUESTION = "Quais canais de compra existem?"
+
+# Canned replies keyed on a phrase from each node's system prompt.
+FAKE_REPLIES = {
+    "query contextualizer": QUESTION,
+    "classifier": "sql",
+    "senior data analyst": json.dumps(
+        {
+            "steps": ["Select distinct canal"],
+            "tables_needed": ["compras"],
+            "approach": "DISTINCT",
+        }
+    ),
+    "fixing a broken query": "SELECT DISTINCT canal FROM compras",
+    "SQLite expert": "SELECT DISTINCT canal FROM compras",
+    "business data analyst": json.dumps(
+        {
+            "answer": "Os canais de compra disponíveis estão listados na tabela.",
+            "viz_type": "table",
+        }
+    ),
+    "helpful data analytics assistant": "Olá! Pergunte algo sobre os dados.",
+}
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers each node with a canned reply after a fixed delay, streaming word by word."""
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _reply(self, messages: list[BaseMessage]) -> str:
+        system = str(messages[0].content)
+        for marker, reply in FAKE_REPLIES.items():
+            if marker in system:
+                return reply
+        return ""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        message = AIMessage(content=self._reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for word in self._reply(messages).split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def _serve_in_process(llm_latency: float) -> str:
+    """Start api.app with the fake LLM on a free local port and return its URL."""
+    # Overrides .env on purpose: test threads must not land in the real shared
+    # checkpoint database, and fake replies must not land in the real LLM cache (nor can they replay it).
+    tmp = tempfile.mkdtemp()
+    os.environ["CHECKPOINT_DB"] = os.path.join(tmp, "loadtest_checkpoints.db")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(tmp, "loadtest_llm_cache.db")
+    if os.environ.get("LLM_CACHE_MODE") == "replay":
+        os.environ["LLM_CACHE_MODE"] = "record"
+
+    import uvicorn
+
+    import api
+    from franq_agent.utils import nodes
+    from franq_agent.utils.llm_cache import llm_cache
+
+    # Goes through the same response cache as the real model, so its lookups
+    # are part of the measurement and the per-node hit rates are reported.
+    nodes.llm = FakeChatModel(latency=llm_latency, cache=llm_cache)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(
+        uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def _one_run(client: httpx.AsyncClient) -> dict[str, Any]:
+    thread_id = (await client.post("/threads")).json()["thread_id"]
+    start = time.perf_counter()
+    first_token = None
+    event = None
+
+    async with client.stream(
+        "POST", f"/threads/{thread_id}/runs", json={"question": QUESTION}
+    ) as response:
+        if response.status_code != 200:
+            return {"status": response.status_code}
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line.removeprefix("event: ")
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - start
+
+    return {
+        "status": 200 if event == "done" else "stream_error",
+        "latency": time.perf_counter() - start,
+        "first_token": first_token,
+    }
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+async def _load_test(url: str, total: int, concurrency: int) -> None:
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    results: list[dict[str, Any]] = []
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            results.append(await _one_run(client))
+
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        cache = (await client.get("/cache/stats")).json()
+
+    ok = [r for r in results if r["status"] == 200]
+    latencies = [r["latency"] for r in ok]
+    first_tokens = [r["first_token"] for r in ok if r["first_token"] is not None]
+    failures: dict[str, int] = {}
+    for r in results:
+        if r["status"] != 200:
+            failures[str(r["status"])] = failures.get(str(r["status"]), 0) + 1
+
+    print(f"requests     {len(results)} ({len(ok)} ok, failures: {failures or 'none'})")
+    print(f"duration     {elapsed:.2f}s")
+    print(f"throughput   {len(ok) / elapsed:.1f} req/s")
+    for label, values in (("latency", latencies), ("first token", first_tokens)):
+        print(
+            f"{label:<12} p50 {_percentile(values, 50) * 1000:.0f}ms  "
+            f"p95 {_percentile(values, 95) * 1000:.0f}ms  "
+            f"p99 {_percentile(values, 99) * 1000:.0f}ms  "
+            f"max {max(values, default=float('nan')) * 1000:.0f}ms"
+        )
+    if latencies:
+        print(f"mean         {statistics.mean(latencies) * 1000:.0f}ms")
+    # Stats come from whichever worker answered, so with --workers N they
+    # cover only that worker's share of the traffic.
+    for node, stats in cache["nodes"].items():
+        print(
+            f"cache        {node:<16} {stats['hit_rate']:.0%} hit "
+            f"({stats['hits']}/{stats['hits'] + stats['misses']}, mode {cache['mode']})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url", help="Target a running API instead of an in-process one"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=0.05,
+        help="Seconds the fake LLM waits per call (in-process mode only)",
+    )
+    args = parser.parse_args()
+
+    url = args.url or _serve_in_process(args.llm_latency)
+    asyncio.run(_load_test(url, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()